@@ -0,0 +1,166 @@
+import base64
+import json
+import os
+import sqlite3
+import time
+from urllib.parse import urlparse, parse_qsl, urlencode
+
+API_STORE_FILENAME = 'api_store.sqlite'
+
+# Query parameters that only bust caches and would make every polling call unique
+VOLATILE_PARAMS = {'_', 't', 'ts', 'timestamp', 'time', 'nocache', 'cachebuster'}
+
+
+def normalize_query(query):
+    """Sort query parameters and drop cache busters"""
+    params = [(key, value) for key, value in parse_qsl(query, keep_blank_values=True)
+              if key.lower() not in VOLATILE_PARAMS]
+    return urlencode(sorted(params))
+
+
+def enable_network_capture(options):
+    """Turn on Chrome's performance log, which carries the network events"""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+class ApiStore:
+    """Recorded API responses keyed by method, path and normalized query"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS responses (
+                method TEXT NOT NULL,
+                path TEXT NOT NULL,
+                query TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                content_type TEXT,
+                body BLOB,
+                recorded_at REAL,
+                PRIMARY KEY (method, path, query)
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        ''')
+
+    def set_api_prefix(self, api_url):
+        """Remember which local paths are API calls"""
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                              ('api_prefix', urlparse(api_url).path))
+
+    def record(self, method, url, status, content_type, body):
+        parsed = urlparse(url)
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(method, path, query, status, content_type, body, recorded_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (method.upper(), parsed.path, normalize_query(parsed.query),
+                 status, content_type, body, time.time()))
+
+    def load(self):
+        """Load every response into memory for the replay server"""
+        prefix = self.conn.execute("SELECT value FROM meta WHERE key = 'api_prefix'").fetchone()
+        index = ApiIndex(prefix[0] if prefix else '/api/')
+        rows = self.conn.execute(
+            'SELECT method, path, query, status, content_type, body FROM responses ORDER BY recorded_at')
+        for method, path, query, status, content_type, body in rows:
+            index.add(method, path, query, (status, content_type, body))
+        return index
+
+    def close(self):
+        self.conn.close()
+
+
+class ApiIndex:
+    """In-memory lookup of recorded responses used by the replay server"""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.exact = {}  # (method, path, normalized query) -> response
+
+    def __len__(self):
+        return len(self.exact)
+
+    def add(self, method, path, query, response):
+        self.exact[(method, path, query)] = response
+
+    def is_api_path(self, path):
+        return path.startswith(self.prefix)
+
+    def lookup(self, method, path, query):
+        """Return (status, content_type, body), or None if this exact call was not recorded
+
+        Cache busters are already dropped from the query, so polling calls
+        match. Any other query must match exactly: the response recorded for
+        ?id=1 is not an answer to ?id=5.
+        """
+        return self.exact.get((method.upper(), path, normalize_query(query)))
+
+
+class ApiRecorder:
+    """Record the XHR/fetch responses of API calls made while a page renders"""
+
+    def __init__(self, store, api_url):
+        self.store = store
+        self.api_url = api_url
+        self.methods = {}    # requestId -> HTTP method
+        self.responses = {}  # requestId -> response event of an API call
+        store.set_api_prefix(api_url)
+
+    def collect(self, driver):
+        """Store the API responses seen since the last call; return how many were stored"""
+        finished = []
+        for entry in driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            params = message.get('params', {})
+            request_id = params.get('requestId')
+
+            if message['method'] == 'Network.requestWillBeSent':
+                if params['request']['url'].startswith(self.api_url):
+                    self.methods[request_id] = params['request']['method']
+            elif message['method'] == 'Network.responseReceived':
+                if params.get('type') in ('XHR', 'Fetch') and params['response']['url'].startswith(self.api_url):
+                    self.responses[request_id] = params['response']
+            elif message['method'] == 'Network.loadingFinished' and request_id in self.responses:
+                finished.append(request_id)
+
+        stored = 0
+        for request_id in finished:
+            response = self.responses.pop(request_id)
+            method = self.methods.pop(request_id, 'GET')
+            if method == 'OPTIONS':
+                continue
+            try:
+                result = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            except Exception as e:
+                print(f"Could not read API response {response['url']}: {e}")
+                continue
+            if result.get('base64Encoded'):
+                body = base64.b64decode(result['body'])
+            else:
+                body = result['body'].encode('utf-8')
+            self.store.record(method, response['url'], response['status'], response.get('mimeType'), body)
+            stored += 1
+        return stored
+
+
+def localize_api_url(output_dir, api_url):
+    """Point the mirrored scripts at the local server instead of the live API"""
+    local_path = urlparse(api_url).path
+    for dir_path, _, filenames in os.walk(output_dir):
+        for filename in filenames:
+            if not filename.endswith(('.js', '.html')):
+                continue
+            full_path = os.path.join(dir_path, filename)
+            with open(full_path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+                content = f.read()
+            if api_url not in content:
+                continue
+            with open(full_path, 'w', encoding='utf-8', errors='surrogateescape') as f:
+                f.write(content.replace(api_url, local_path))
+            print(f"Pointed API calls in {full_path} to {local_path}")
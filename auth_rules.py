@@ -0,0 +1,203 @@
+import json
+import re
+
+from bs4 import NavigableString
+
+# Each rule says where to look for its keywords:
+#   attributes - attribute name -> keywords found in that attribute ('*' means any attribute)
+#   text       - keywords found in the text directly inside the element
+#   tags       - only elements with these tag names (the element holding the text for text keywords)
+#   scope      - 'form' to match anywhere inside a form and remove the whole form: text
+#                across all of the form's descendants, attribute names and values
+DEFAULT_AUTH_RULES = [
+    {
+        'name': 'login-form',
+        'scope': 'form',
+        'attributes': {'*': ['login', 'signin', 'sign in', 'username', 'password']},
+        'text': ['login', 'signin', 'sign in', 'username', 'password'],
+    },
+    {
+        'name': 'auth-class',
+        'attributes': {'class': ['login', 'signin', 'auth']},
+    },
+    {
+        'name': 'auth-id',
+        'attributes': {'id': ['login', 'signin', 'auth']},
+    },
+    {
+        'name': 'auth-script',
+        'tags': ['script'],
+        'text': ['login', 'auth', 'token', 'jwt', 'session'],
+    },
+]
+
+
+def describe(element):
+    """Short CSS-like description of an element for reports"""
+    description = element.name
+    if element.get('id'):
+        description += '#' + element['id']
+    classes = element.get('class') or []
+    if classes:
+        description += '.' + '.'.join(classes)
+    return description
+
+
+class AuthRuleEngine:
+    """Remove authentication elements with all rules compiled into one matcher
+
+    Every keyword of every rule goes into a single regex. The document is
+    walked once; each attribute value or text node that a rule could apply
+    to is scanned once, and the keywords found are mapped back to the rules
+    that use them. Form-scoped rules are matched against the form as a
+    whole when the walk reaches it, so text split over several elements
+    ("Sign <b>in</b>") and attribute names (data-password) count too.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = rules if rules is not None else DEFAULT_AUTH_RULES
+        self.compile()
+
+    @classmethod
+    def from_file(cls, path):
+        """Load a rule set from a JSON file holding a list of rules"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def compile(self):
+        # keyword -> [(rule index, field)], field is an attribute name, '*' or None for text
+        uses = {}
+        self.watched_attributes = set()
+        self.any_attribute = False
+        self.text_tags = set()
+        self.any_text = False
+        self.form_rules = set()      # Rules matched against whole forms, not during the walk
+        self.form_text_tags = set()  # Tags whose text form-scoped rules with tags look at
+
+        for index, rule in enumerate(self.rules):
+            scoped = rule.get('scope') == 'form'
+            if scoped:
+                self.form_rules.add(index)
+            for attribute, keywords in rule.get('attributes', {}).items():
+                if attribute == '*':
+                    self.any_attribute = self.any_attribute or not scoped
+                elif not scoped:
+                    self.watched_attributes.add(attribute)
+                for keyword in keywords:
+                    uses.setdefault(keyword.lower(), []).append((index, attribute))
+            if rule.get('text'):
+                if scoped:
+                    self.form_text_tags.update(rule.get('tags', []))
+                else:
+                    if rule.get('tags'):
+                        self.text_tags.update(rule['tags'])
+                    else:
+                        self.any_text = True
+                for keyword in rule['text']:
+                    uses.setdefault(keyword.lower(), []).append((index, None))
+
+        # A match of 'authentication' is also a match of 'auth', so precompute
+        # the uses of every keyword contained in each keyword
+        self.keyword_uses = {}
+        for keyword in uses:
+            self.keyword_uses[keyword] = [use for other, other_uses in uses.items()
+                                          if other in keyword for use in other_uses]
+
+        # Longest first, so the regex reports the most specific keyword
+        alternatives = sorted(uses, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(re.escape(k) for k in alternatives)) if alternatives else None
+
+    def match(self, value, field):
+        """Return (rule index, keyword) pairs of the rules that match value in field"""
+        matches = []
+        seen = set()
+        for keyword in set(self.pattern.findall(value.lower())):
+            for index, rule_field in self.keyword_uses[keyword]:
+                if index in seen:
+                    continue
+                if rule_field == field or (rule_field == '*' and field is not None):
+                    seen.add(index)
+                    matches.append((index, keyword))
+        return matches
+
+    def target(self, rule, element):
+        """The element a rule removes, or None if the rule does not apply here"""
+        if rule.get('tags') and element.name not in rule['tags']:
+            return None
+        return element
+
+    def match_form(self, form):
+        """Return (rule index, keyword) pairs of the form-scoped rules matching anywhere in form"""
+        matches = {}
+
+        def collect(element, value, field):
+            for index, keyword in self.match(value, field):
+                rule = self.rules[index]
+                if index not in self.form_rules or index in matches:
+                    continue
+                if not rule.get('tags') or element.name in rule['tags']:
+                    matches[index] = keyword
+
+        # get_text joins the text of all descendants, so 'Sign <b>in</b>' reads 'Sign in'
+        collect(form, form.get_text(), None)
+        for element in [form] + form.find_all(True):
+            for attribute, value in element.attrs.items():
+                if isinstance(value, list):
+                    value = ' '.join(value)
+                collect(element, value, attribute)
+                collect(element, attribute, attribute)
+            if element is not form and element.name in self.form_text_tags:
+                collect(element, element.get_text(), None)
+        return list(matches.items())
+
+    def apply(self, soup):
+        """Remove matching elements in one pass; return a report of what was removed"""
+        if self.pattern is None:
+            return []
+
+        removed = {}   # id(element) -> element
+        report = []
+
+        def remove(index, element, keyword):
+            if element is None or id(element) in removed:
+                return
+            removed[id(element)] = element
+            report.append({'rule': self.rules[index]['name'], 'element': describe(element), 'match': keyword})
+
+        stack = [soup]
+        while stack:
+            node = stack.pop()
+
+            if isinstance(node, NavigableString):
+                parent = node.parent
+                if not (self.any_text or parent.name in self.text_tags):
+                    continue
+                for index, keyword in self.match(str(node), None):
+                    if index not in self.form_rules:
+                        remove(index, self.target(self.rules[index], parent), keyword)
+                continue
+
+            if node.name == 'form' and self.form_rules:
+                for index, keyword in self.match_form(node):
+                    remove(index, node, keyword)
+
+            for attribute, value in node.attrs.items():
+                if not self.any_attribute and attribute not in self.watched_attributes:
+                    continue
+                if isinstance(value, list):
+                    value = ' '.join(value)
+                for index, keyword in self.match(value, attribute):
+                    if index not in self.form_rules:
+                        remove(index, self.target(self.rules[index], node), keyword)
+
+            # The subtree of a removed element goes with it, no need to look inside
+            if id(node) in removed:
+                continue
+            stack.extend(reversed(node.contents))
+
+        # Find the outermost removed elements before changing the tree
+        outermost = [element for element in removed.values()
+                     if not any(id(parent) in removed for parent in element.parents)]
+        for element in outermost:
+            element.decompose()
+        return report
@@ -0,0 +1,208 @@
+import time
+from collections import deque
+
+from session_store import SessionLostError
+
+
+class BrowserManager:
+    """Own the Chrome instance: reuse tabs and recycle the browser when it gets too big or slow
+
+    SPAs with polling timers keep growing the renderer's heap over long crawls.
+    Every page is loaded in a pooled tab; the previous tab is parked on
+    about:blank so its timers stop, and a tab is replaced by a fresh one after
+    max_tab_pages navigations. The whole browser is restarted after max_pages
+    navigations, when the page heap passes max_memory_mb or when navigation
+    gets max_latency_factor times slower than at the start. The session
+    (cookies and web storage) is copied into every new tab and carried over
+    restarts, since sessionStorage, where MSAL keeps its tokens, is per tab.
+    A tab that turns out to be logged out is closed and SessionLostError is
+    raised, so the crawl stops instead of mirroring login pages.
+    """
+
+    def __init__(self, create_driver, session_store=None, max_pages=200, max_memory_mb=1024,
+                 max_latency_factor=3.0, tab_pool_size=2, max_tab_pages=25):
+        self.create_driver = create_driver  # Callable returning a new webdriver
+        self.session_store = session_store
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.max_latency_factor = max_latency_factor
+        self.tab_pool_size = tab_pool_size
+        self.max_tab_pages = max_tab_pages
+
+        self.driver = None
+        self.pages = 0               # Navigations since the browser was started
+        self.tab_pages = {}          # Window handle -> navigations in that tab
+        self.idle_tabs = deque()     # Parked tabs ready for reuse
+        self.active_tab = None
+        self.restored_tab = False    # The next page loads in the tab the session was restored in
+        self.latencies = deque(maxlen=5)
+        self.baseline_latency = None
+        self.recycles = 0
+
+    def start(self):
+        """Start a new browser"""
+        self.driver = self.create_driver()
+        self.pages = 0
+        self.active_tab = self.driver.current_window_handle
+        self.tab_pages = {self.active_tab: 0}
+        self.idle_tabs.clear()
+        self.restored_tab = False
+        self.latencies.clear()
+        self.baseline_latency = None
+        return self.driver
+
+    def quit(self):
+        if self.driver:
+            self.driver.quit()
+            self.driver = None
+
+    def get(self, url):
+        """Navigate to url in a pooled tab, recycling the browser first if needed"""
+        # By now the previous page has had time to be redirected to login
+        if self.pages:
+            self.check_login_host()
+
+        if self.should_recycle():
+            self.recycle()
+
+        state = None
+        if self.restored_tab:
+            self.restored_tab = False
+        else:
+            state = self.switch_tab()
+
+        if state:
+            # A new tab starts with empty sessionStorage, copy the session into it first
+            self.session_store.apply(self.driver, state, url)
+            self.check_session()
+        else:
+            start = time.monotonic()
+            self.driver.get(url)
+            self.record_latency(time.monotonic() - start)
+            self.check_login_host()
+
+        self.pages += 1
+        self.tab_pages[self.active_tab] += 1
+
+    def switch_tab(self):
+        """Park the current tab and move to a reusable (or fresh) one
+
+        Returns the session to copy into the tab when a fresh one was opened.
+        """
+        previous = self.active_tab
+        retire = self.tab_pages[previous] >= self.max_tab_pages
+        if self.tab_pool_size < 2 and not retire:
+            return None
+
+        if retire:
+            del self.tab_pages[previous]
+        reuse = (self.idle_tabs or not retire) and len(self.tab_pages) >= self.tab_pool_size
+        # Capture before parking, the previous tab still holds the session
+        state = None if reuse else self.capture_session()
+
+        if not retire:
+            # about:blank stops the SPA's polling timers in the background tab
+            self.driver.execute_script("window.location.href = 'about:blank';")
+            self.idle_tabs.append(previous)
+
+        if reuse:
+            self.active_tab = self.idle_tabs.popleft()
+            self.driver.switch_to.window(self.active_tab)
+        else:
+            self.driver.switch_to.new_window('tab')
+            self.active_tab = self.driver.current_window_handle
+            self.tab_pages[self.active_tab] = 0
+
+        if retire:
+            # Closing the tab releases its renderer's memory
+            self.driver.switch_to.window(previous)
+            self.driver.close()
+            self.driver.switch_to.window(self.active_tab)
+        return state
+
+    def capture_session(self):
+        """Session of the current tab, or None if there is nothing to carry over"""
+        if not self.session_store or not self.driver.current_url.startswith(('http://', 'https://')):
+            return None
+        try:
+            return self.session_store.capture(self.driver)
+        except Exception as e:
+            print(f"Could not capture session: {e}")
+            return None
+
+    def check_session(self):
+        """Stop rather than crawl login pages when the session did not carry over"""
+        if not self.session_store.is_logged_in(self.driver):
+            self.session_lost()
+
+    def check_login_host(self):
+        """Quick check, without waiting, that the current tab was not sent to login"""
+        if self.session_store and self.session_store.on_login_host(self.driver):
+            self.session_lost()
+
+    def session_lost(self):
+        """Take the logged-out tab out of the pool and stop the crawl"""
+        url = self.driver.current_url
+        tab = self.active_tab
+        if self.idle_tabs:
+            # Closing the last tab would end the browser, so only close it if another is left
+            del self.tab_pages[tab]
+            self.driver.close()
+            self.active_tab = self.idle_tabs.popleft()
+            self.driver.switch_to.window(self.active_tab)
+        raise SessionLostError(f"Browser lost the logged-in session at {url}")
+
+    def record_latency(self, latency):
+        self.latencies.append(latency)
+        if self.baseline_latency is None and len(self.latencies) == self.latencies.maxlen:
+            self.baseline_latency = sorted(self.latencies)[len(self.latencies) // 2]
+
+    def memory_mb(self):
+        """JS heap used by the current page, in MB (None if unavailable)"""
+        try:
+            self.driver.execute_cdp_cmd('Performance.enable', {})
+            metrics = self.driver.execute_cdp_cmd('Performance.getMetrics', {})
+            for metric in metrics.get('metrics', []):
+                if metric['name'] == 'JSHeapUsedSize':
+                    return metric['value'] / (1024 * 1024)
+        except Exception:
+            pass
+        try:
+            used = self.driver.execute_script(
+                "return window.performance.memory ? window.performance.memory.usedJSHeapSize : null;")
+            return used / (1024 * 1024) if used else None
+        except Exception:
+            return None
+
+    def should_recycle(self):
+        if not self.driver or not self.pages:
+            return False
+        if self.pages >= self.max_pages:
+            print(f"Recycling browser after {self.pages} pages")
+            return True
+
+        memory = self.memory_mb()
+        if memory and memory >= self.max_memory_mb:
+            print(f"Recycling browser at {memory:.0f} MB of JS heap")
+            return True
+
+        if self.baseline_latency and len(self.latencies) == self.latencies.maxlen:
+            average = sum(self.latencies) / len(self.latencies)
+            if average > self.baseline_latency * self.max_latency_factor:
+                print(f"Recycling browser, navigation slowed from {self.baseline_latency:.1f}s to {average:.1f}s")
+                return True
+        return False
+
+    def recycle(self):
+        """Restart the browser and carry the logged-in session over"""
+        state = self.capture_session()
+
+        self.quit()
+        self.start()
+        self.recycles += 1
+
+        if state:
+            self.session_store.apply(self.driver, state, state['url'])
+            self.check_session()
+            # Only this tab has the restored sessionStorage, so load the next page here
+            self.restored_tab = True
@@ -1,9 +1,15 @@
 import os
+import sys
 import time
+import socket
+import argparse
 import requests
 import urllib.parse
 import re
 import json
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -12,36 +18,95 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, NavigableString
+from retry_scheduler import RetryScheduler
+from session_store import SessionStore, SessionLostError
+from frontier import SQLiteFrontier, OUTPUT_MARKER, DONE
+from browser_manager import BrowserManager
+from auth_rules import AuthRuleEngine
+import api_capture
+import search_index
+import manifest
+
+# url(...) references in CSS, with or without quotes
+CSS_URL_PATTERN = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+# @import "file.css" (the url() form is covered by CSS_URL_PATTERN)
+CSS_IMPORT_PATTERN = re.compile(r'@import\s+([\'"])([^\'"]+)\1')
+
+# Scripts and stylesheets the page loaded, in load order. Webpack removes the <script>
+# tags of chunks once they have run, so the rendered source does not list them.
+LOADED_ASSETS_SCRIPT = '''
+return performance.getEntriesByType('resource')
+    .map(function (entry) { return entry.name; })
+    .filter(function (url) { return /\\.(js|css)(\\?|$)/.test(url.split('#')[0]); });
+'''
+
+# API the portal's React app talks to (REACT_APP_API_URL in env.js)
+API_URL = "https://api-portal.dieuquy.delivn.vn/api/v1/"
 
 class WebCrawler:
-    def __init__(self, base_url, output_dir):
+    def __init__(self, base_url, output_dir, session_path='.session/claude.json', frontier=None, worker_id=None,
+                 auth_rules_path=None, api_url=None):
         self.base_url = base_url
         self.output_dir = output_dir
+        
+        # Ensure output directory exists
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+            
         self.visited_urls = set()
         self.pending_urls = set()
         self.failed_urls = set()
+        self.retry_scheduler = RetryScheduler()
+        self.session_store = SessionStore(session_path)
         self.cookies = {}
         self.page_data = {}  # Store raw page data for staticalization
+        self.local_paths = {}  # Map downloaded resource URLs to local paths
+        self.bundles = {}  # Bundled member files -> bundle path, shared between pages
         
-        # Ensure output directory exists
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-            
-        # Initialize the Chrome driver
+        # Record the SPA's API responses so the mirror can replay them offline
+        self.api_recorder = None
+        if api_url:
+            api_store = api_capture.ApiStore(os.path.join(output_dir, api_capture.API_STORE_FILENAME))
+            self.api_recorder = api_capture.ApiRecorder(api_store, api_url)
+        
+        # Rules for stripping login forms and auth scripts (JSON file to override the defaults)
+        self.auth_rules = AuthRuleEngine.from_file(auth_rules_path) if auth_rules_path else AuthRuleEngine()
+        
+        # Frontier shared with other worker processes (distributed mode)
+        self.frontier = frontier
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        
+        # Recycles Chrome during long crawls, keeping the logged-in session
+        self.browser = BrowserManager(self.create_driver, self.session_store)
+        
+    @property
+    def driver(self):
+        """The current Chrome driver (it changes when the browser is recycled)"""
+        return self.browser.driver
+        
+    @property
+    def actions(self):
+        return ActionChains(self.driver)
+        
+    def create_driver(self):
+        """Create a Chrome driver"""
         chrome_options = Options()
         chrome_options.add_argument("--window-size=1920,1080")
         # Uncomment the next line if you want to run headless (without UI)
         # chrome_options.add_argument("--headless")
+        if self.api_recorder:
+            api_capture.enable_network_capture(chrome_options)
+        
+        return webdriver.Chrome(options=chrome_options)
         
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.actions = ActionChains(self.driver)
+    def setup_driver(self):
+        """Initialize the Chrome driver"""
+        self.browser.start()
         
     def wait_for_login(self):
-        """Wait for user to manually login and capture cookies"""
-        self.driver.get(self.base_url)
-        print("Please login manually...")
-        input("Press Enter when logged in successfully...")
+        """Restore the saved session or wait for user to manually login, then capture cookies"""
+        self.session_store.ensure_login(self.driver, self.base_url)
         print("Continuing with crawling...")
         
         # Save cookies after login
@@ -96,8 +161,7 @@ class WebCrawler:
         dir_path = os.path.dirname(file_path)
         if dir_path:
             full_dir_path = os.path.join(self.output_dir, dir_path)
-            if not os.path.exists(full_dir_path):
-                os.makedirs(full_dir_path)
+            os.makedirs(full_dir_path, exist_ok=True)
         
         # Full path to save the file
         full_path = os.path.join(self.output_dir, file_path)
@@ -134,21 +198,32 @@ class WebCrawler:
             
         return url
     
-    def download_resource(self, url):
+    def download_resource(self, url, page_url=None):
         """Download a resource (CSS, JS, images)"""
         try:
+            if url in self.local_paths:
+                return self.local_paths[url]
             if url in self.visited_urls:
                 return None
                 
             # Normalize URL
             url = self.normalize_url(url)
+            if url in self.local_paths:
+                return self.local_paths[url]
             
             # Only download resources from the same domain
             if not self.is_same_domain(url):
                 return None
                 
+            # Don't wait on the timeout of a host that keeps failing
+            if not self.retry_scheduler.allow(url):
+                if not self.retry_scheduler.defer(url, page_url):
+                    self.failed_urls.add(url)
+                return None
+                
             # Download the resource with cookies
             response = requests.get(url, cookies=self.cookies, timeout=10)
+            response.raise_for_status()
             content_type = response.headers.get('Content-Type', '')
             
             # Save the file
@@ -156,31 +231,39 @@ class WebCrawler:
             
             # Mark as visited
             self.visited_urls.add(url)
+            self.local_paths[url] = local_path
+            self.retry_scheduler.record_success(url)
             
             return local_path
             
         except Exception as e:
             print(f"Error downloading resource {url}: {e}")
-            self.failed_urls.add(url)
+            if not self.retry_scheduler.schedule(url, e, page_url):
+                self.failed_urls.add(url)
             return None
             
-    def process_pages_to_static(self):
-        """Process all pages to create a static version without login requirement"""
-        print("\nProcessing pages to create static versions...")
+    def retry_resource(self, url, page_url):
+        """Retry a resource download and attach it to the page that referenced it"""
+        local_path = self.download_resource(url, page_url)
+        if local_path and page_url in self.page_data:
+            self.page_data[page_url]['resources'].append({
+                'url': url,
+                'local_path': local_path
+            })
+            # The page's result was published without this resource, replace it
+            if self.frontier and page_url in self.visited_urls:
+                self.frontier.complete(page_url, self.worker_id, self.page_data[page_url])
+            
+    def process_pages_to_static(self, bundle=False, bundle_max_size=20 * 1024):
+        """Process all pages to create a static version without login requirement
         
-        # First, extract all JavaScript and add to a list to be included in all pages
-        all_js_files = set()
-        for url, data in self.page_data.items():
-            for resource in data['resources']:
-                if resource['local_path'].endswith('.js'):
-                    all_js_files.add(resource['local_path'])
+        Each page only gets the JS and CSS files it loaded itself. With bundle=True,
+        runs of adjacent script or stylesheet tags loading small files are
+        replaced in place by one tag loading a shared bundle.
+        """
+        print("\nProcessing pages to create static versions...")
         
-        # Also create a list of all CSS files
-        all_css_files = set()
-        for url, data in self.page_data.items():
-            for resource in data['resources']:
-                if resource['local_path'].endswith('.css'):
-                    all_css_files.add(resource['local_path'])
+        page_assets = self.build_page_assets()
         
         # Process each page to make it static
         for url, data in self.page_data.items():
@@ -193,21 +276,22 @@ class WebCrawler:
                 soup = BeautifulSoup(html, 'html.parser')
                 
                 # Remove any login forms or authentication scripts
-                self.remove_auth_elements(soup)
+                self.remove_auth_elements(soup, url)
                 
                 # Fix all relative URLs in the page
                 self.fix_relative_urls(soup, url)
                 
-                # Ensure all JS files are included
-                self.ensure_all_scripts_included(soup, all_js_files)
+                # Ensure the JS and CSS files this page loaded are included
+                js_files, css_files = page_assets[url]
+                self.ensure_scripts_included(soup, js_files)
+                self.ensure_css_included(soup, css_files)
                 
-                # Ensure all CSS files are included
-                self.ensure_all_css_included(soup, all_css_files)
-                
-                # Remove any script that contains 'login', 'auth', 'authentication', etc.
-                self.remove_auth_scripts(soup)
+                if bundle:
+                    self.bundle_tags(soup.find_all('script', src=True), 'src', 'js', bundle_max_size)
+                    self.bundle_tags(soup.find_all('link', rel="stylesheet"), 'href', 'css', bundle_max_size)
                 
                 # Save the processed HTML
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
                 with open(file_path, 'w', encoding='utf-8') as f:
                     f.write(str(soup))
                     
@@ -216,28 +300,12 @@ class WebCrawler:
             except Exception as e:
                 print(f"Error processing static version of {url}: {e}")
                 
-    def remove_auth_elements(self, soup):
-        """Remove authentication-related elements"""
-        # Remove forms that might be login forms
-        for form in soup.find_all('form'):
-            form_html = str(form).lower()
-            if any(keyword in form_html for keyword in ['login', 'signin', 'sign in', 'username', 'password']):
-                form.decompose()
-        
-        # Remove elements with IDs or classes related to login
-        for element in soup.find_all(class_=lambda c: c and any(keyword in c.lower() for keyword in ['login', 'signin', 'auth'])):
-            element.decompose()
-            
-        for element in soup.find_all(id=lambda i: i and any(keyword in i.lower() for keyword in ['login', 'signin', 'auth'])):
-            element.decompose()
-            
-    def remove_auth_scripts(self, soup):
-        """Remove scripts related to authentication"""
-        for script in soup.find_all('script'):
-            if script.string:
-                script_text = script.string.lower()
-                if any(keyword in script_text for keyword in ['login', 'auth', 'token', 'jwt', 'session']):
-                    script.decompose()
+    def remove_auth_elements(self, soup, url=''):
+        """Remove login forms, auth-related elements and auth scripts in one pass"""
+        report = self.auth_rules.apply(soup)
+        for entry in report:
+            print(f"Removed {entry['element']} from {url} (rule {entry['rule']}, matched '{entry['match']}')")
+        return report
                     
     def fix_relative_urls(self, soup, base_url):
         """Fix all relative URLs in the page"""
@@ -271,30 +339,118 @@ class WebCrawler:
             if not src.startswith(('http://', 'https://', '#')):
                 script['src'] = urljoin(base_url, src)
                 
-    def ensure_all_scripts_included(self, soup, js_files):
-        """Ensure all JavaScript files are included in the page"""
+    def build_page_assets(self):
+        """Map each page to the downloaded JS and CSS files it loaded, in load order"""
+        page_assets = {}
+        for url, data in self.page_data.items():
+            js_files = []
+            css_files = []
+            for asset_url in data.get('loaded_assets', []):
+                local_path = self.local_paths.get(self.normalize_url(asset_url))
+                if not local_path:
+                    continue
+                if local_path.endswith('.js') and local_path not in js_files:
+                    js_files.append(local_path)
+                elif local_path.endswith('.css') and local_path not in css_files:
+                    css_files.append(local_path)
+            page_assets[url] = (js_files, css_files)
+        return page_assets
+        
+    def bundle_tags(self, tags, attribute, extension, max_size):
+        """Replace runs of adjacent tags loading small local files with one tag loading a bundle"""
+        runs = []
+        for tag in tags:
+            local_path = self.bundle_member(tag, attribute, extension, max_size)
+            if not local_path:
+                continue
+            # Only merge tags with nothing but whitespace between them, so load order is kept
+            if runs and self.next_tag(runs[-1][-1][0]) is tag:
+                runs[-1].append((tag, local_path))
+            else:
+                runs.append([(tag, local_path)])
+                
+        for run in runs:
+            if len(run) < 2:
+                continue
+            run[0][0][attribute] = '/' + self.write_bundle([local_path for _, local_path in run], extension)
+            for tag, _ in run[1:]:
+                tag.decompose()
+                
+    def bundle_member(self, tag, attribute, extension, max_size):
+        """Local path of the file a tag loads if it can go into a bundle, else None"""
+        # async, defer, type="module", media, integrity... change how the file loads
+        if set(tag.attrs) - {attribute, 'rel', 'type'}:
+            return None
+        if extension == 'js' and tag.get('type', 'text/javascript') not in ('text/javascript', 'application/javascript'):
+            return None
+            
+        url = self.normalize_url(tag[attribute])
+        if not self.is_same_domain(url):
+            return None
+        local_path = self.local_paths.get(url) or self.asset_key(url)
+        full_path = os.path.join(self.output_dir, local_path)
+        if not os.path.isfile(full_path) or os.path.getsize(full_path) > max_size:
+            return None
+        if extension == 'css':
+            with open(full_path, 'rb') as f:
+                # @import must stay at the top of a stylesheet, keep those separate
+                if b'@import' in f.read():
+                    return None
+        return local_path
+        
+    def next_tag(self, tag):
+        """The next sibling of tag, skipping whitespace"""
+        sibling = tag.next_sibling
+        while isinstance(sibling, NavigableString) and not sibling.strip():
+            sibling = sibling.next_sibling
+        return sibling
+        
+    def write_bundle(self, files, extension):
+        """Concatenate files into a bundle named after its members"""
+        key = tuple(files)
+        if key in self.bundles:
+            return self.bundles[key]
+            
+        name = hashlib.sha1('\n'.join(files).encode('utf-8')).hexdigest()[:12]
+        bundle_path = f"static/bundles/{name}.{extension}"
+        full_path = os.path.join(self.output_dir, bundle_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        
+        # A separator keeps a file without a trailing semicolon from merging into the next one
+        separator = b';\n' if extension == 'js' else b'\n'
+        with open(full_path, 'wb') as bundle:
+            for local_path in files:
+                with open(os.path.join(self.output_dir, local_path), 'rb') as f:
+                    bundle.write(f.read())
+                bundle.write(separator)
+                
+        self.bundles[key] = bundle_path
+        print(f"Bundled {len(files)} {extension} files into {bundle_path}")
+        return bundle_path
+        
+    def asset_key(self, url):
+        """Local path an included asset URL maps to"""
+        return urllib.parse.urlparse(url).path.strip('/')
+        
+    def ensure_scripts_included(self, soup, js_files):
+        """Ensure the given JavaScript files are included in the page"""
         head = soup.find('head')
         if not head:
             head = soup.find('html')
             if not head:
                 return
         
-        # Add all JS files
+        # Look the existing scripts up once instead of for every file
+        included = {self.asset_key(script['src']) for script in soup.find_all('script', src=True)}
         for js_file in js_files:
-            # Check if the script is already included
-            already_included = False
-            for script in soup.find_all('script', src=True):
-                if js_file in script['src']:
-                    already_included = True
-                    break
-                    
-            if not already_included:
-                new_script = soup.new_tag('script')
-                new_script['src'] = '/' + js_file
-                head.append(new_script)
+            if js_file in included:
+                continue
+            new_script = soup.new_tag('script')
+            new_script['src'] = '/' + js_file
+            head.append(new_script)
                 
-    def ensure_all_css_included(self, soup, css_files):
-        """Ensure all CSS files are included in the page"""
+    def ensure_css_included(self, soup, css_files):
+        """Ensure the given CSS files are included in the page"""
         head = soup.find('head')
         if not head:
             head = soup.new_tag('head')
@@ -304,20 +460,15 @@ class WebCrawler:
             else:
                 return
         
-        # Add all CSS files
+        # Look the existing stylesheets up once instead of for every file
+        included = {self.asset_key(link.get('href', '')) for link in soup.find_all('link', rel="stylesheet")}
         for css_file in css_files:
-            # Check if the CSS is already included
-            already_included = False
-            for link in soup.find_all('link', rel="stylesheet"):
-                if css_file in link.get('href', ''):
-                    already_included = True
-                    break
-                    
-            if not already_included:
-                new_link = soup.new_tag('link')
-                new_link['rel'] = 'stylesheet'
-                new_link['href'] = '/' + css_file
-                head.append(new_link)
+            if css_file in included:
+                continue
+            new_link = soup.new_tag('link')
+            new_link['rel'] = 'stylesheet'
+            new_link['href'] = '/' + css_file
+            head.append(new_link)
     
     def get_page_resources(self, html, page_url):
         """Extract CSS, JS and image resources from HTML"""
@@ -369,14 +520,97 @@ class WebCrawler:
         if not style_text:
             return []
             
-        urls = []
         # Extract URLs from url() functions
-        import re
-        url_pattern = r'url\([\'"]?([^\'"]+)[\'"]?\)'
-        matches = re.findall(url_pattern, style_text)
-        urls.extend(matches)
+        return [match.group(2) for match in CSS_URL_PATTERN.finditer(style_text)]
+    
+    def resolve_css_reference(self, reference, stylesheet_url):
+        """Resolve a url()/@import reference relative to the stylesheet that contains it"""
+        reference = reference.strip()
+        if not reference or reference.startswith(('data:', '#', 'about:', 'javascript:')):
+            return None
+        return urljoin(stylesheet_url, reference).split('#')[0]
+    
+    def get_stylesheet_references(self, stylesheet_url, local_path):
+        """Return the url() and @import references of a downloaded stylesheet"""
+        full_path = os.path.join(self.output_dir, local_path)
+        if not os.path.exists(full_path):
+            print(f"Skipping missing stylesheet {full_path}")
+            return {}
+        with open(full_path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+            css = f.read()
+            
+        references = {}
+        for pattern in (CSS_URL_PATTERN, CSS_IMPORT_PATTERN):
+            for match in pattern.finditer(css):
+                resolved = self.resolve_css_reference(match.group(2), stylesheet_url)
+                if resolved:
+                    references[match.group(2)] = resolved
+        return references
+    
+    def rewrite_stylesheet(self, local_path, references):
+        """Point the references of a stylesheet at the local copies of its assets"""
+        local_refs = {}
+        for reference, url in references.items():
+            asset_path = self.local_paths.get(url) or self.local_paths.get(self.normalize_url(url))
+            if asset_path:
+                local_refs[reference] = '/' + asset_path
+        if not local_refs:
+            return
+            
+        def replace(match):
+            target = local_refs.get(match.group(2))
+            if not target:
+                return match.group(0)
+            return match.group(0).replace(match.group(2), target)
+            
+        full_path = os.path.join(self.output_dir, local_path)
+        with open(full_path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+            css = f.read()
+        css = CSS_URL_PATTERN.sub(replace, css)
+        css = CSS_IMPORT_PATTERN.sub(replace, css)
+        with open(full_path, 'w', encoding='utf-8', errors='surrogateescape') as f:
+            f.write(css)
+            
+    def crawl_css_assets(self, max_workers=8):
+        """Fetch fonts, images and @imports referenced from downloaded stylesheets"""
+        print("\nCrawling assets referenced from stylesheets...")
+        pending = {url: path for url, path in self.local_paths.items() if path.endswith('.css')}
+        stylesheets = {}  # stylesheet URL -> (local path, references)
+        seen = set(self.local_paths)
         
-        return urls
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or self.retry_scheduler:
+                if pending:
+                    # Parse this level of stylesheets and fetch everything new they reference
+                    batch = []
+                    for css_url, local_path in pending.items():
+                        references = self.get_stylesheet_references(css_url, local_path)
+                        stylesheets[css_url] = (local_path, references)
+                        for url in references.values():
+                            if url not in seen:
+                                seen.add(url)
+                                batch.append((url, css_url))
+                else:
+                    # Only retries left, wait for the next backoff to expire
+                    time.sleep(self.retry_scheduler.next_delay())
+                    batch = self.retry_scheduler.pop_ready()
+                    
+                urls = [url for url, _ in batch]
+                referrers = [css_url for _, css_url in batch]
+                results = executor.map(self.download_resource, urls, referrers)
+                
+                # Stylesheets pulled in by @import are parsed on the next round
+                pending = {}
+                for url, local_path in zip(urls, results):
+                    url = self.normalize_url(url)
+                    if local_path and local_path.endswith('.css') and url not in stylesheets:
+                        pending[url] = local_path
+                        
+        # Rewrite once everything, including retries, has been downloaded
+        for local_path, references in stylesheets.values():
+            self.rewrite_stylesheet(local_path, references)
+            
+        print(f"Processed {len(stylesheets)} stylesheets")
     
     def hover_menu_items(self, url):
         """Find and hover over menu items to reveal dropdowns"""
@@ -422,7 +656,7 @@ class WebCrawler:
             
         try:
             print(f"Crawling: {url}")
-            self.driver.get(url)
+            self.browser.get(url)
             
             # Wait for page to load
             WebDriverWait(self.driver, 10).until(
@@ -444,7 +678,7 @@ class WebCrawler:
             resource_map = {}  # Map original URLs to local paths
             
             for resource in resources:
-                local_path = self.download_resource(resource)
+                local_path = self.download_resource(resource, url)
                 if local_path:
                     resource_map[resource] = local_path
                     self.page_data[url]['resources'].append({
@@ -458,6 +692,7 @@ class WebCrawler:
             
             # Mark as visited
             self.visited_urls.add(url)
+            self.retry_scheduler.record_success(url)
                 
             # Find links on the page
             links = self.driver.find_elements(By.TAG_NAME, 'a')
@@ -472,23 +707,169 @@ class WebCrawler:
             # Handle dropdown menus
             self.hover_menu_items(url)
             
+            # Download the chunks the page loaded on demand, including while hovering menus
+            self.record_loaded_assets(url)
+            
+            # Store the API calls the page made while rendering
+            if self.api_recorder:
+                recorded = self.api_recorder.collect(self.driver)
+                print(f"Recorded {recorded} API responses")
+            
+        except SessionLostError:
+            # Every page from here on would be a login page, stop the crawl
+            raise
         except Exception as e:
             print(f"Error crawling {url}: {e}")
-            self.failed_urls.add(url)
+            if not self.retry_scheduler.schedule(url, e):
+                self.failed_urls.add(url)
+    
+    def record_loaded_assets(self, url):
+        """Store the JS and CSS files the page loaded and download those not seen yet"""
+        loaded = [asset for asset in self.driver.execute_script(LOADED_ASSETS_SCRIPT) if self.is_same_domain(asset)]
+        data = self.page_data[url]
+        data['loaded_assets'] = loaded
+        
+        listed = {resource['url'] for resource in data['resources']}
+        for asset in loaded:
+            if asset in listed:
+                continue
+            local_path = self.download_resource(asset, url)
+            if local_path:
+                listed.add(asset)
+                data['resources'].append({
+                    'url': asset,
+                    'local_path': local_path
+                })
+                
+    def requeue_retries(self):
+        """Move URLs whose backoff has expired back into the crawl"""
+        for url, page_url in self.retry_scheduler.pop_ready():
+            if page_url is None:
+                self.pending_urls.add(url)
+            else:
+                self.retry_resource(url, page_url)
+    
+    def crawl_from_frontier(self, lease_seconds=300, poll_interval=5):
+        """Crawl URLs leased from a frontier shared with other workers"""
+        print(f"Worker {self.worker_id} crawling from the shared frontier")
+        self.frontier.add([self.base_url])
+        
+        while True:
+            # Hand newly found links to the shared frontier
+            self.requeue_retries()
+            self.frontier.add(self.pending_urls)
+            self.pending_urls.clear()
+            
+            urls = self.frontier.lease(self.worker_id, lease_seconds=lease_seconds)
+            if not urls:
+                if self.frontier.is_done() and not self.retry_scheduler:
+                    break
+                # Other workers may still add URLs, or leases may expire
+                time.sleep(poll_interval)
+                continue
+                
+            for url in urls:
+                if url in self.visited_urls and url in self.page_data:
+                    self.frontier.complete(url, self.worker_id, self.page_data[url])
+                    continue
+                if not self.retry_scheduler.allow(url):
+                    if self.retry_scheduler.defer(url):
+                        self.frontier.release(url, self.worker_id, self.retry_scheduler.take(url))
+                    else:
+                        self.failed_urls.add(url)
+                        self.frontier.fail(url, self.worker_id)
+                    continue
+                    
+                try:
+                    self.crawl_page(url)
+                except SessionLostError:
+                    # Hand the URL back at once so a logged-in worker can take it
+                    self.frontier.release(url, self.worker_id)
+                    raise
+                
+                if url in self.visited_urls:
+                    self.frontier.complete(url, self.worker_id, self.page_data[url])
+                elif url in self.failed_urls:
+                    self.frontier.fail(url, self.worker_id)
+                else:
+                    # Let the frontier retry it, possibly on another worker
+                    delay = self.retry_scheduler.take(url) or 0
+                    self.frontier.release(url, self.worker_id, delay)
+                    
+                # Sleep to avoid overloading the server
+                time.sleep(1)
+                
+        print(f"Frontier exhausted: {self.frontier.stats()}")
+        
+    def load_frontier_results(self):
+        """Load the pages crawled by all workers for post-processing"""
+        self.page_data = self.frontier.load_results()
+        missing = 0
+        for url, data in self.page_data.items():
+            self.visited_urls.add(url)
+            resources = []
+            for resource in data['resources']:
+                # A worker that did not write into the shared output directory leaves holes
+                if not os.path.exists(os.path.join(self.output_dir, resource['local_path'])):
+                    missing += 1
+                    continue
+                resources.append(resource)
+                self.visited_urls.add(resource['url'])
+                self.local_paths[self.normalize_url(resource['url'])] = resource['local_path']
+            data['resources'] = resources
+        print(f"Loaded {len(self.page_data)} pages from the shared frontier")
+        if missing:
+            print(f"Skipped {missing} resources whose files are not in {self.output_dir}")
+            
+    def check_output_dir(self):
+        """Return an error message unless output_dir is the one shared by the frontier's workers
+        
+        Only page results go through the frontier. Resource files and recorded
+        API responses are written to output_dir, so every worker and the
+        finalize run must use the same directory, e.g. on a network mount.
+        """
+        marker = os.path.join(self.output_dir, OUTPUT_MARKER)
+        store_id = self.frontier.store_id()
+        if os.path.exists(marker):
+            with open(marker, 'r', encoding='utf-8') as f:
+                if f.read().strip() != store_id:
+                    return f"{self.output_dir} holds the output of another frontier"
+            return None
+        if self.frontier.stats().get(DONE):
+            return (f"Other workers already crawled pages, but their files are not in {self.output_dir}; "
+                    "use the output directory shared by all workers")
+        with open(marker, 'w', encoding='utf-8') as f:
+            f.write(store_id)
+        return None
     
     def crawl(self):
         """Main crawling process"""
+        self.setup_driver()
         try:
             # Wait for manual login
             self.wait_for_login()
             
+            if self.frontier:
+                self.crawl_from_frontier()
+                return
+            
             # Start with the base URL
             self.pending_urls.add(self.base_url)
             
-            # Crawl while there are pending URLs
-            while self.pending_urls:
+            # Crawl while there are pending or retrying URLs
+            while self.pending_urls or self.retry_scheduler:
+                self.requeue_retries()
+                if not self.pending_urls:
+                    # Nothing to do until the next backoff expires
+                    time.sleep(self.retry_scheduler.next_delay())
+                    continue
+                    
                 url = self.pending_urls.pop()
                 if url not in self.visited_urls:
+                    if not self.retry_scheduler.allow(url):
+                        if not self.retry_scheduler.defer(url):
+                            self.failed_urls.add(url)
+                        continue
                     self.crawl_page(url)
                     # Sleep to avoid overloading the server
                     time.sleep(1)
@@ -498,7 +879,7 @@ class WebCrawler:
             
         finally:
             # Cleanup
-            self.driver.quit()
+            self.browser.quit()
             
 def create_web_server_file(output_dir):
     """Create a Python script to serve the downloaded website locally"""
@@ -507,6 +888,8 @@ import http.server
 import socketserver
 import os
 import sys
+import json
+from urllib.parse import urlparse, parse_qs
 
 # Get port from command line or use default
 if len(sys.argv) > 1:
@@ -523,7 +906,61 @@ class MyHttpRequestHandler(http.server.SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         http.server.SimpleHTTPRequestHandler.end_headers(self)
         
+    def send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        
+    def do_search(self):
+        # Full-text search over the crawled pages: /search?q=...&limit=...
+        if SEARCH_INDEX is None:
+            return self.send_json(404, {'error': 'No search index, run: python search_index.py build .'})
+        params = parse_qs(urlparse(self.path).query)
+        query = params.get('q', [''])[0]
+        try:
+            limit = int(params.get('limit', ['10'])[0])
+        except ValueError:
+            limit = 10
+        return self.send_json(200, {'query': query, 'results': SEARCH_INDEX.search(query, limit)})
+        
+    def do_api(self):
+        # Answer API calls from the responses recorded during the crawl
+        parsed = urlparse(self.path)
+        response = API_INDEX.lookup(self.command, parsed.path, parsed.query)
+        if response is None:
+            return self.send_json(404, {'error': 'No recorded response for ' + parsed.path})
+        status, content_type, body = response
+        self.send_response(status)
+        self.send_header('Content-Type', content_type or 'application/json')
+        self.send_header('Content-Length', str(len(body or b'')))
+        self.end_headers()
+        self.wfile.write(body or b'')
+        
+    def is_api_call(self):
+        return API_INDEX is not None and API_INDEX.is_api_path(urlparse(self.path).path)
+        
+    def do_POST(self):
+        # Consume the request body; recorded responses are keyed without it
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        if self.is_api_call():
+            return self.do_api()
+        return self.send_json(405, {'error': 'Method not allowed'})
+        
+    do_PUT = do_POST
+    do_PATCH = do_POST
+    do_DELETE = do_POST
+        
     def do_GET(self):
+        if self.is_api_call():
+            return self.do_api()
+        if urlparse(self.path).path == '/search':
+            return self.do_search()
+            
         # Special case for root URL
         if self.path == '/' or self.path == '':
             self.path = '/index.html'
@@ -537,6 +974,26 @@ class MyHttpRequestHandler(http.server.SimpleHTTPRequestHandler):
 # Change to the directory of this script
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
+# Load the search index once so queries are answered from memory
+SEARCH_INDEX = None
+try:
+    from search_index import SearchIndex, INDEX_FILENAME
+    if os.path.exists(INDEX_FILENAME):
+        SEARCH_INDEX = SearchIndex.load(INDEX_FILENAME)
+        print(f"Loaded search index with {len(SEARCH_INDEX.docs)} pages")
+except ImportError:
+    pass
+
+# Load the recorded API responses so the SPA works without the live API
+API_INDEX = None
+try:
+    from api_capture import ApiStore, API_STORE_FILENAME
+    if os.path.exists(API_STORE_FILENAME):
+        API_INDEX = ApiStore(API_STORE_FILENAME).load()
+        print(f"Loaded {len(API_INDEX)} recorded API responses")
+except ImportError:
+    pass
+
 Handler = MyHttpRequestHandler
 with socketserver.TCPServer(("", PORT), Handler) as httpd:
     print(f"Serving at http://localhost:{PORT}")
@@ -552,12 +1009,34 @@ with socketserver.TCPServer(("", PORT), Handler) as httpd:
     server_file_path = os.path.join(output_dir, 'serve_website.py')
     with open(server_file_path, 'w') as f:
         f.write(server_script)
+        
+    # The server answers /search and API calls with the modules that built their data
+    shutil.copy(search_index.__file__, os.path.join(output_dir, 'search_index.py'))
+    shutil.copy(api_capture.__file__, os.path.join(output_dir, 'api_capture.py'))
     
     print(f"Created web server script at {server_file_path}")
     print("To run the local web server, navigate to the 'crawled_data' directory and run:")
     print("    python serve_website.py")
     print("Then open http://localhost:8000 in your web browser")
     
+def create_search_index(output_dir, page_data):
+    """Create a full-text search index of the crawled pages"""
+    index = search_index.build_index_from_pages(page_data)
+    index_path = os.path.join(output_dir, search_index.INDEX_FILENAME)
+    index.save(index_path)
+    
+    print(f"Created search index of {len(index.docs)} pages at {index_path}")
+    print("Search it with: python search_index.py query crawled_data <words>")
+    
+def create_manifest(output_dir):
+    """Create a hashed manifest of the crawl and report what changed since the last one"""
+    previous = manifest.load_manifest(os.path.join(output_dir, manifest.MANIFEST_FILENAME))
+    current = manifest.write_manifest(output_dir)
+    if previous:
+        print("Changes since the previous crawl:")
+        print(manifest.format_report(manifest.diff_manifests(previous, current)))
+    print("Publish only the changed files with: python manifest.py publish crawled_data <destination>")
+    
 def create_site_map(output_dir, page_data):
     """Create a site map HTML file"""
     sitemap_html = '''
@@ -622,17 +1101,57 @@ def create_site_map(output_dir, page_data):
     print(f"Created site map at {sitemap_path}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl the portal into a static website")
+    parser.add_argument('--frontier',
+                        help="SQLite file shared by several crawler processes (distributed mode)")
+    parser.add_argument('--worker-id', help="Name of this worker in distributed mode")
+    parser.add_argument('--finalize', action='store_true',
+                        help="Post-process the pages crawled by all workers instead of crawling")
+    parser.add_argument('--bundle', action='store_true',
+                        help="Merge the small JS and CSS files each page needs into shared bundles")
+    parser.add_argument('--output-dir', default="crawled_data",
+                        help="Output directory; in distributed mode it must be shared by all workers")
+    args = parser.parse_args()
+    
     base_url = "https://portal.dieuquy.delivn.vn/"
-    output_dir = "crawled_data"
+    output_dir = args.output_dir
+    
+    frontier = SQLiteFrontier(args.frontier) if args.frontier else None
+    crawler = WebCrawler(base_url, output_dir, frontier=frontier, worker_id=args.worker_id, api_url=API_URL)
+    
+    if frontier:
+        error = crawler.check_output_dir()
+        if error:
+            parser.error(error)
+    
+    if args.finalize:
+        if not frontier:
+            parser.error("--finalize requires --frontier")
+        crawler.load_frontier_results()
+    else:
+        crawler.crawl()
+        if frontier:
+            # Post-processing runs once, after all workers are finished
+            print("Worker finished. Run with --finalize once all workers are done.")
+            sys.exit(0)
     
-    crawler = WebCrawler(base_url, output_dir)
-    crawler.crawl()
+    # Fetch the assets referenced from the downloaded stylesheets
+    crawler.crawl_css_assets()
     
     # Process pages to create static versions
-    crawler.process_pages_to_static()
+    crawler.process_pages_to_static(bundle=args.bundle)
+    
+    # Send the SPA's API calls to the local server, which replays the recorded responses
+    api_capture.localize_api_url(output_dir, API_URL)
     
     # Create site map
     create_site_map(output_dir, crawler.page_data)
     
+    # Create full-text search index
+    create_search_index(output_dir, crawler.page_data)
+    
     # Create web server file
     create_web_server_file(output_dir)
+    
+    # Create the manifest last so it covers every generated file
+    create_manifest(output_dir)
@@ -9,18 +9,25 @@ import time
 import requests
 from urllib.parse import urljoin, urlparse
 import logging
+from retry_scheduler import RetryScheduler
+from session_store import SessionStore, SessionLostError
+from browser_manager import BrowserManager
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
 class PortalCrawler:
-    def __init__(self, base_url):
+    def __init__(self, base_url, session_path='.session/copilot.json'):
         self.base_url = base_url
         self.domain = urlparse(base_url).netloc
         self.visited_urls = set()
         self.to_visit = set()
-        self.driver = None
+        self.failed_urls = set()
+        self.retry_scheduler = RetryScheduler()
+        self.session_store = SessionStore(session_path)
+        # Recycles Chrome during long crawls, keeping the logged-in session
+        self.browser = BrowserManager(self.create_driver, self.session_store)
         self.output_dir = "crawled_data_copilot"
         
         # Create output directories
@@ -31,18 +38,33 @@ class PortalCrawler:
         for dir_name in ['html', 'css', 'js', 'images']:
             os.makedirs(os.path.join(self.output_dir, dir_name), exist_ok=True)
             
-    def setup_driver(self):
-        """Initialize Chrome WebDriver"""
+    @property
+    def driver(self):
+        """The current Chrome driver (it changes when the browser is recycled)"""
+        return self.browser.driver
+        
+    def create_driver(self):
+        """Create a Chrome WebDriver"""
         options = webdriver.ChromeOptions()
         service = Service()
-        self.driver = webdriver.Chrome(service=service, options=options)
+        return webdriver.Chrome(service=service, options=options)
+        
+    def setup_driver(self):
+        """Initialize Chrome WebDriver"""
+        self.browser.start()
         
     def save_file(self, url, file_type):
         """Download and save a file"""
+        if not self.retry_scheduler.allow(url):
+            if not self.retry_scheduler.defer(url, file_type):
+                self.failed_urls.add(url)
+            return
+            
         try:
             response = requests.get(url, timeout=10)
             if response.status_code != 200:
                 logging.warning(f"Failed to download {url}, status: {response.status_code}")
+                response.raise_for_status()
                 return
                 
             parsed_url = urlparse(url)
@@ -57,9 +79,12 @@ class PortalCrawler:
             with open(file_path, 'wb') as f:
                 f.write(response.content)
             logging.info(f"Saved {file_type}: {filename}")
+            self.retry_scheduler.record_success(url)
             
         except Exception as e:
             logging.error(f"Error downloading {url}: {e}")
+            if not self.retry_scheduler.schedule(url, e, file_type):
+                self.failed_urls.add(url)
     
     def save_current_page(self):
         """Save current page HTML"""
@@ -154,28 +179,46 @@ class PortalCrawler:
         
         return links
     
+    def requeue_retries(self):
+        """Move URLs whose backoff has expired back into the crawl"""
+        for url, file_type in self.retry_scheduler.pop_ready():
+            if file_type is None:
+                self.to_visit.add(url)
+            else:
+                self.save_file(url, file_type)
+    
     def crawl(self):
         """Main crawling function"""
         self.setup_driver()
         
         try:
-            # Open the login page and wait for manual login
-            self.driver.get(self.base_url)
-            logging.info("Please log in manually. Press Enter after successful login.")
-            input()
+            # Reuse the saved session, or open the login page and wait for manual login
+            self.session_store.ensure_login(
+                self.driver, self.base_url,
+                prompt="Please log in manually. Press Enter after successful login.")
             
             # Start crawling from the base URL
             self.driver.get(self.base_url)
             self.to_visit.add(self.base_url)
             
-            while self.to_visit:
+            while self.to_visit or self.retry_scheduler:
+                self.requeue_retries()
+                if not self.to_visit:
+                    # Nothing to do until the next backoff expires
+                    time.sleep(self.retry_scheduler.next_delay())
+                    continue
+                    
                 url = self.to_visit.pop()
                 if url in self.visited_urls:
                     continue
+                if not self.retry_scheduler.allow(url):
+                    if not self.retry_scheduler.defer(url):
+                        self.failed_urls.add(url)
+                    continue
                     
                 logging.info(f"Visiting: {url}")
                 try:
-                    self.driver.get(url)
+                    self.browser.get(url)
                     
                     # Wait for page to load
                     WebDriverWait(self.driver, 10).until(
@@ -195,19 +238,26 @@ class PortalCrawler:
                     
                     # Mark as visited
                     self.visited_urls.add(url)
+                    self.retry_scheduler.record_success(url)
                     
                     # Small delay to avoid overloading the server
                     time.sleep(1)
                     
+                except SessionLostError:
+                    # Every page from here on would be a login page, stop the crawl
+                    raise
                 except Exception as e:
                     logging.error(f"Error processing {url}: {e}")
-                    self.visited_urls.add(url)  # Mark as visited to avoid retrying
+                    if not self.retry_scheduler.schedule(url, e):
+                        # Permanent failure: mark as visited to avoid retrying
+                        self.failed_urls.add(url)
+                        self.visited_urls.add(url)
                     
             logging.info(f"Crawling completed. Visited {len(self.visited_urls)} URLs.")
+            logging.info(f"Failed to crawl {len(self.failed_urls)} URLs.")
             
         finally:
-            if self.driver:
-                self.driver.quit()
+            self.browser.quit()
 
 if __name__ == "__main__":
     crawler = PortalCrawler("https://portal.dieuquy.delivn.vn/")
@@ -1,28 +1,159 @@
-from selenium import webdriver
-from pywebcopy import save_webpage
+from pywebcopy.configs import get_config
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, urlparse
+from session_store import SessionStore
+import argparse
+import copy
+import io
+import re
+import threading
+import requests
 import time
 import os
 
-options = webdriver.ChromeOptions()
-# Tuỳ chọn: giữ trình duyệt mở sau khi script kết thúc
-options.add_experimental_option("detach", True)
+START_URL = "https://tinhte.vn/"  # 👉 thay bằng trang bạn muốn tải
 
-driver = webdriver.Chrome(options=options)
-driver.get("https://tinhte.vn/")  # 👉 thay bằng trang bạn muốn tải
+SITEMAP_LOC_PATTERN = re.compile(r'<loc>\s*([^<\s]+)\s*</loc>')
+SITEMAP_HREF_PATTERN = re.compile(r'href="([^"#]+)"')
 
-print("⏳ Hãy đăng nhập thủ công và nhấn Enter khi hoàn tất...")
-input()
 
-time.sleep(3)  # đợi trang load kỹ
-url = driver.current_url
-folder = os.path.join(os.getcwd(), "saved_site")
+class SharedAssetAdapter(HTTPAdapter):
+    """Transport dùng chung cho mọi trang: mỗi tài nguyên (css, js, ảnh) chỉ tải một lần"""
 
-# Tải toàn bộ trang web hiện tại
-save_webpage(
-    url=url,
-    project_folder=folder,
-    open_in_browser=False,
-    delay=1,
-)
+    def __init__(self):
+        super().__init__(pool_maxsize=32)
+        self.cache = {}
+        self.url_locks = {}
+        self.lock = threading.Lock()
 
-print(f"✅ Trang đã được lưu vào {folder}")
+    def send(self, request, **kwargs):
+        if request.method != 'GET':
+            return super().send(request, **kwargs)
+
+        with self.lock:
+            url_lock = self.url_locks.setdefault(request.url, threading.Lock())
+
+        # Trang khác đang tải cùng URL thì chờ rồi dùng lại kết quả
+        with url_lock:
+            cached = self.cache.get(request.url)
+            if cached is None:
+                response = super().send(request, **kwargs)
+                # Đọc hết body; pywebcopy đọc lại từ raw nên raw phải được thay bằng bản đệm
+                response.content
+                # Trang HTML và lỗi (503 tạm thời, 401 khi phiên hết hạn) không được dùng lại cho trang khác
+                if not response.ok or 'text/html' in response.headers.get('Content-Type', ''):
+                    return self.rewound(response)
+                self.cache[request.url] = cached = response
+            # Mỗi trang nhận một bản sao riêng của response
+            return self.rewound(copy.copy(cached))
+
+    @staticmethod
+    def rewound(response):
+        """Gắn raw mới đọc từ đầu body đã đệm"""
+        response.raw = io.BytesIO(response.content)
+        return response
+
+
+def read_url_list(path):
+    """Đọc danh sách URL, mỗi dòng một URL (bỏ qua dòng trống và dòng #)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def read_sitemap(source, base_url, cookies):
+    """Lấy URL từ sitemap.xml hoặc sitemap.html (file hoặc URL)"""
+    if source.startswith(('http://', 'https://')):
+        text = requests.get(source, cookies=cookies, timeout=30).text
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            text = f.read()
+
+    urls = SITEMAP_LOC_PATTERN.findall(text) or SITEMAP_HREF_PATTERN.findall(text)
+    return [urljoin(base_url, url) for url in urls]
+
+
+def save_page(url, folder, project_name, cookies, user_agent, adapter, delay):
+    """Tải một trang bằng pywebcopy với cookie của phiên đã đăng nhập"""
+    config = get_config(url, project_folder=folder, project_name=project_name,
+                        bypass_robots=True, delay=delay)
+    page = config.create_page()
+
+    session = page.session
+    session.headers['User-Agent'] = user_agent
+    for cookie in cookies:
+        session.cookies.set(cookie['name'], cookie['value'],
+                            domain=cookie.get('domain'), path=cookie.get('path', '/'))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    page.get(url)
+    page.save_complete(pop=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tải các trang cần đăng nhập bằng phiên của trình duyệt")
+    parser.add_argument('urls', nargs='*', help="Các URL cần tải (mặc định: trang hiện tại sau khi đăng nhập)")
+    parser.add_argument('--start-url', default=START_URL, help="Trang để đăng nhập")
+    parser.add_argument('--url-list', help="File chứa danh sách URL, mỗi dòng một URL")
+    parser.add_argument('--sitemap', help="sitemap.xml hoặc sitemap.html (file hoặc URL)")
+    parser.add_argument('--workers', type=int, default=4, help="Số trang tải song song")
+    parser.add_argument('--delay', type=float, default=1, help="Độ trễ giữa các request của pywebcopy")
+    parser.add_argument('--folder', default=os.path.join(os.getcwd(), "saved_site"))
+    args = parser.parse_args()
+
+    # Chỉ cần trình duyệt khi chạy script, các hàm tải trang dùng được mà không có selenium
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    # Tuỳ chọn: giữ trình duyệt mở sau khi script kết thúc
+    options.add_experimental_option("detach", True)
+
+    driver = webdriver.Chrome(options=options)
+
+    # Dùng lại phiên đăng nhập đã lưu, chỉ hỏi đăng nhập khi phiên đã hết hạn
+    session_store = SessionStore(".session/outlook.json")
+    session_store.ensure_login(
+        driver, args.start_url,
+        prompt="⏳ Hãy đăng nhập thủ công và nhấn Enter khi hoàn tất...")
+
+    time.sleep(3)  # đợi trang load kỹ
+    cookies = driver.get_cookies()
+    user_agent = driver.execute_script("return navigator.userAgent;")
+
+    urls = list(args.urls)
+    if args.url_list:
+        urls.extend(read_url_list(args.url_list))
+    if args.sitemap:
+        urls.extend(read_sitemap(args.sitemap, driver.current_url,
+                                 {cookie['name']: cookie['value'] for cookie in cookies}))
+    if not urls:
+        urls = [driver.current_url]
+    urls = list(dict.fromkeys(urls))
+
+    # Mọi trang vào cùng một thư mục dự án, tài nguyên dùng chung chỉ tải một lần
+    project_name = urlparse(urls[0]).netloc
+    adapter = SharedAssetAdapter()
+    failed = []
+
+    print(f"📥 Đang tải {len(urls)} trang với {args.workers} luồng...")
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(save_page, url, args.folder, project_name, cookies, user_agent, adapter, args.delay): url
+            for url in urls
+        }
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                future.result()
+                print(f"✅ {url}")
+            except Exception as e:
+                print(f"❌ {url}: {e}")
+                failed.append(url)
+
+    print(f"✅ Đã lưu {len(urls) - len(failed)}/{len(urls)} trang vào {os.path.join(args.folder, project_name)}")
+    print(f"♻️ Tải {len(adapter.cache)} tài nguyên dùng chung, mỗi cái một lần")
+
+
+if __name__ == "__main__":
+    main()
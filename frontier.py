@@ -0,0 +1,176 @@
+import json
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+# URL states in the frontier
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+# File in the output directory naming the frontier whose workers write into it
+OUTPUT_MARKER = '.frontier_id'
+
+
+class Frontier(ABC):
+    """Crawl frontier and seen-set shared by several crawler processes
+
+    Workers lease URLs for a limited time. A URL whose lease expires
+    (e.g. because its worker crashed) is handed out again, up to a limit,
+    so a URL that keeps crashing its worker can't take every worker down.
+    """
+
+    @abstractmethod
+    def add(self, urls):
+        """Add URLs that have not been seen before; return how many were new"""
+
+    @abstractmethod
+    def lease(self, worker_id, count=1, lease_seconds=300):
+        """Lease up to count URLs that are ready to be crawled"""
+
+    @abstractmethod
+    def complete(self, url, worker_id, result=None):
+        """Mark a leased URL as crawled and store its result"""
+
+    @abstractmethod
+    def release(self, url, worker_id, delay=0):
+        """Give a leased URL back so it can be retried after delay seconds"""
+
+    @abstractmethod
+    def fail(self, url, worker_id):
+        """Mark a leased URL as permanently failed"""
+
+    @abstractmethod
+    def is_done(self):
+        """Return True when no URL is pending or leased"""
+
+    @abstractmethod
+    def load_results(self):
+        """Return the results stored by all workers, keyed by URL"""
+
+    @abstractmethod
+    def stats(self):
+        """Return the number of URLs in each state"""
+
+    @abstractmethod
+    def store_id(self):
+        """Return a random id that stays the same for the lifetime of the frontier"""
+
+
+class SQLiteFrontier(Frontier):
+    """Frontier backed by a SQLite file, e.g. on a disk shared by all workers"""
+
+    def __init__(self, path, timeout=30, max_attempts=5):
+        self.path = path
+        self.max_attempts = max_attempts  # Leases of one URL before it is given up
+        # Autocommit mode, transactions are opened explicitly where needed
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                available_at REAL NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS urls_status ON urls (status, available_at);
+            CREATE TABLE IF NOT EXISTS results (
+                url TEXT PRIMARY KEY,
+                worker TEXT,
+                data TEXT
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        ''')
+
+    def add(self, urls):
+        urls = list(urls)
+        if not urls:
+            return 0
+        before = self.conn.total_changes
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            self.conn.executemany('INSERT OR IGNORE INTO urls (url) VALUES (?)', [(url,) for url in urls])
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        return self.conn.total_changes - before
+
+    def lease(self, worker_id, count=1, lease_seconds=300):
+        now = time.time()
+        # BEGIN IMMEDIATE takes the write lock, so two workers never lease the same URL
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            given_up = self.conn.execute(
+                'UPDATE urls SET status = ?, worker = NULL, lease_expires = NULL '
+                'WHERE ((status = ? AND available_at <= ?) OR (status = ? AND lease_expires < ?)) '
+                'AND attempts >= ?',
+                (FAILED, PENDING, now, LEASED, now, self.max_attempts)).rowcount
+            rows = self.conn.execute(
+                'SELECT url FROM urls '
+                'WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires < ?) '
+                'ORDER BY available_at LIMIT ?',
+                (PENDING, now, LEASED, now, count)).fetchall()
+            urls = [row[0] for row in rows]
+            self.conn.executemany(
+                'UPDATE urls SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1 '
+                'WHERE url = ?',
+                [(LEASED, worker_id, now + lease_seconds, url) for url in urls])
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        if given_up:
+            print(f"Gave up on {given_up} URLs leased {self.max_attempts} times without being finished")
+        return urls
+
+    def complete(self, url, worker_id, result=None):
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            self.conn.execute('UPDATE urls SET status = ?, lease_expires = NULL WHERE url = ?', (DONE, url))
+            if result is not None:
+                self.conn.execute('INSERT OR REPLACE INTO results (url, worker, data) VALUES (?, ?, ?)',
+                                  (url, worker_id, json.dumps(result)))
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    def release(self, url, worker_id, delay=0):
+        # Only the current lease holder may give the URL back
+        self.conn.execute(
+            'UPDATE urls SET status = ?, worker = NULL, lease_expires = NULL, available_at = ? '
+            'WHERE url = ? AND status = ? AND worker = ?',
+            (PENDING, time.time() + delay, url, LEASED, worker_id))
+
+    def fail(self, url, worker_id):
+        self.conn.execute(
+            'UPDATE urls SET status = ?, lease_expires = NULL WHERE url = ? AND status = ? AND worker = ?',
+            (FAILED, url, LEASED, worker_id))
+
+    def is_done(self):
+        row = self.conn.execute('SELECT COUNT(*) FROM urls WHERE status IN (?, ?)', (PENDING, LEASED)).fetchone()
+        return row[0] == 0
+
+    def load_results(self):
+        results = {}
+        for url, data in self.conn.execute('SELECT url, data FROM results'):
+            results[url] = json.loads(data)
+        return results
+
+    def stats(self):
+        return dict(self.conn.execute('SELECT status, COUNT(*) FROM urls GROUP BY status').fetchall())
+
+    def store_id(self):
+        # The first worker to ask creates the id, the others read it
+        self.conn.execute('INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)', ('store_id', uuid.uuid4().hex))
+        return self.conn.execute("SELECT value FROM meta WHERE key = 'store_id'").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,188 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+MANIFEST_FILENAME = 'manifest.json'
+
+# Generated files that should not be part of the snapshot
+IGNORED_NAMES = {MANIFEST_FILENAME, '__pycache__', '.frontier_id'}
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_directory(files, dirs):
+    """Hash of a directory node, derived from the hashes of its children"""
+    digest = hashlib.sha256()
+    for name in sorted(files):
+        digest.update(f"f {name} {files[name]['hash']}\n".encode('utf-8'))
+    for name in sorted(dirs):
+        digest.update(f"d {name} {dirs[name]['hash']}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def build_manifest(root, previous=None):
+    """Build a per-directory Merkle tree of the files under root
+
+    Files whose size and mtime match the previous manifest keep their hash
+    instead of being read again.
+    """
+    files = {}
+    dirs = {}
+    previous = previous or {}
+    previous_files = previous.get('files', {})
+    previous_dirs = previous.get('dirs', {})
+
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.name in IGNORED_NAMES:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                dirs[entry.name] = build_manifest(entry.path, previous_dirs.get(entry.name))
+            elif entry.is_file(follow_symlinks=False):
+                stat = entry.stat()
+                old = previous_files.get(entry.name)
+                if old and old['size'] == stat.st_size and old['mtime'] == stat.st_mtime_ns:
+                    file_hash = old['hash']
+                else:
+                    file_hash = hash_file(entry.path)
+                files[entry.name] = {'hash': file_hash, 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+    return {'hash': hash_directory(files, dirs), 'files': files, 'dirs': dirs}
+
+
+def save_manifest(manifest, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_manifest(root):
+    """Build the manifest of root, reusing its previous one, and save it inside root"""
+    path = os.path.join(root, MANIFEST_FILENAME)
+    manifest = build_manifest(root, load_manifest(path))
+    save_manifest(manifest, path)
+    print(f"Created manifest at {path} (root hash {manifest['hash'][:12]})")
+    return manifest
+
+
+def list_files(node, prefix=''):
+    """All file paths under a manifest node"""
+    paths = [prefix + name for name in node['files']]
+    for name, child in node['dirs'].items():
+        paths.extend(list_files(child, prefix + name + '/'))
+    return paths
+
+
+def diff_manifests(old, new, prefix=''):
+    """Compare two manifests, only descending into directories whose hash changed"""
+    changes = {'added': [], 'removed': [], 'modified': []}
+    if old is None or new is None or old['hash'] == new['hash']:
+        if old is None and new is not None:
+            changes['added'] = list_files(new, prefix)
+        elif new is None and old is not None:
+            changes['removed'] = list_files(old, prefix)
+        return changes
+
+    for name, entry in new['files'].items():
+        old_entry = old['files'].get(name)
+        if old_entry is None:
+            changes['added'].append(prefix + name)
+        elif old_entry['hash'] != entry['hash']:
+            changes['modified'].append(prefix + name)
+    for name in old['files']:
+        if name not in new['files']:
+            changes['removed'].append(prefix + name)
+
+    for name in set(old['dirs']) | set(new['dirs']):
+        child = diff_manifests(old['dirs'].get(name), new['dirs'].get(name), prefix + name + '/')
+        for kind in changes:
+            changes[kind].extend(child[kind])
+    return changes
+
+
+def format_report(changes):
+    lines = []
+    for kind, marker in (('added', '+'), ('removed', '-'), ('modified', '~')):
+        for path in sorted(changes[kind]):
+            lines.append(f"{marker} {path}")
+    lines.append(f"{len(changes['added'])} added, {len(changes['removed'])} removed, "
+                 f"{len(changes['modified'])} modified")
+    return '\n'.join(lines)
+
+
+def publish(source, destination):
+    """Update destination to match source, copying only the files that changed"""
+    new = write_manifest(source)
+    old = load_manifest(os.path.join(destination, MANIFEST_FILENAME))
+    if old is None and os.path.isdir(destination):
+        # No manifest yet: hash what is there so unchanged files are still skipped
+        old = build_manifest(destination)
+    changes = diff_manifests(old, new)
+
+    for path in changes['added'] + changes['modified']:
+        target = os.path.join(destination, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(os.path.join(source, path), target)
+    for path in changes['removed']:
+        target = os.path.join(destination, path)
+        if os.path.exists(target):
+            os.remove(target)
+
+    save_manifest(build_manifest(destination, new), os.path.join(destination, MANIFEST_FILENAME))
+    print(f"Published {source} to {destination}: {len(changes['added'])} added, "
+          f"{len(changes['removed'])} removed, {len(changes['modified'])} modified")
+    return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Snapshot, compare and publish crawled sites')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Write the manifest of a crawl directory')
+    build_parser.add_argument('directory')
+
+    diff_parser = subparsers.add_parser('diff', help='Report what changed between two crawls')
+    diff_parser.add_argument('old', help='Old crawl directory or manifest file')
+    diff_parser.add_argument('new', help='New crawl directory or manifest file')
+    diff_parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    publish_parser = subparsers.add_parser('publish', help='Copy only the changed files of a crawl')
+    publish_parser.add_argument('source')
+    publish_parser.add_argument('destination')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        write_manifest(args.directory)
+    elif args.command == 'diff':
+        manifests = []
+        for path in (args.old, args.new):
+            if os.path.isdir(path):
+                # Rehash only files whose size or mtime changed since the saved manifest
+                manifests.append(build_manifest(path, load_manifest(os.path.join(path, MANIFEST_FILENAME))))
+            else:
+                manifests.append(load_manifest(path))
+        changes = diff_manifests(*manifests)
+        print(json.dumps(changes, indent=2) if args.json else format_report(changes))
+    elif args.command == 'publish':
+        publish(args.source, args.destination)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
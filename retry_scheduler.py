@@ -0,0 +1,183 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+# HTTP status codes that are worth trying again later
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+# Exception class names (requests, selenium, builtins) that signal a transient problem
+RETRYABLE_ERROR_NAMES = {
+    'Timeout', 'ConnectTimeout', 'ReadTimeout', 'ConnectionError',
+    'ChunkedEncodingError', 'TimeoutException', 'TimeoutError',
+    'ConnectionResetError', 'ConnectionRefusedError',
+}
+
+
+def is_retryable(error):
+    """Classify an error as retryable (transient) or permanent"""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+
+    for cls in type(error).__mro__:
+        if cls.__name__ in RETRYABLE_ERROR_NAMES:
+            return True
+
+    # Selenium reports network failures as a generic WebDriverException
+    message = str(error)
+    return 'net::ERR_' in message or 'timed out' in message.lower()
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker that stops requests to an origin that keeps failing"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = {}   # host -> consecutive failures
+        self.opened_at = {}  # host -> time the circuit was opened
+        self.lock = threading.Lock()
+
+    def allow(self, host):
+        """Return True if a request to host may be issued now"""
+        with self.lock:
+            opened = self.opened_at.get(host)
+            if opened is None:
+                return True
+            if time.monotonic() - opened >= self.reset_timeout:
+                # Half-open: let one trial request through and re-arm the timer
+                self.opened_at[host] = time.monotonic()
+                return True
+            return False
+
+    def retry_after(self, host):
+        """Seconds until host may be tried again"""
+        with self.lock:
+            opened = self.opened_at.get(host)
+            if opened is None:
+                return 0
+            return max(0, self.reset_timeout - (time.monotonic() - opened))
+
+    def record_success(self, host):
+        with self.lock:
+            self.failures.pop(host, None)
+            self.opened_at.pop(host, None)
+
+    def record_failure(self, host):
+        with self.lock:
+            self.failures[host] = self.failures.get(host, 0) + 1
+            if self.failures[host] >= self.failure_threshold:
+                if host not in self.opened_at:
+                    print(f"Circuit opened for {host} after {self.failures[host]} failures")
+                self.opened_at[host] = time.monotonic()
+
+
+class RetryScheduler:
+    """Re-queue failed URLs with exponential backoff and jitter"""
+
+    def __init__(self, max_retries=3, base_delay=1.0, max_delay=60.0, breaker=None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.attempts = {}  # url -> number of failed attempts
+        self.queue = []     # heap of (ready_at, seq, url, context)
+        self.counter = itertools.count()
+        self.queued = {}    # url -> ready_at of its live queue entry
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.queued)
+
+    def backoff(self, attempt):
+        """Exponential backoff with equal jitter for the given attempt number"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def allow(self, url):
+        """Return True if the circuit breaker lets a request to url through"""
+        return self.breaker.allow(urlparse(url).netloc)
+
+    def defer(self, url, context=None):
+        """Hold url back while its host's circuit is open; return False if it is given up
+
+        A deferral counts as a failed attempt, so URLs queued behind a dead
+        host run out of retries instead of waiting for it forever.
+        """
+        attempt = self._count_attempt(url)
+        if attempt > self.max_retries:
+            print(f"Giving up on {url}, its host is still failing after {attempt - 1} retries")
+            return False
+
+        delay = max(self.breaker.retry_after(urlparse(url).netloc), self.backoff(attempt))
+        self._push(url, context, delay)
+        return True
+
+    def schedule(self, url, error, context=None):
+        """Record a failure; return True if url was re-queued, False if it is given up"""
+        if not is_retryable(error):
+            print(f"Permanent failure for {url}: {error}")
+            return False
+
+        # Only transient errors say something about the health of the host
+        self.breaker.record_failure(urlparse(url).netloc)
+
+        attempt = self._count_attempt(url)
+        if attempt > self.max_retries:
+            print(f"Giving up on {url} after {attempt - 1} retries")
+            return False
+
+        delay = self.backoff(attempt)
+        print(f"Retrying {url} in {delay:.1f}s (attempt {attempt}/{self.max_retries})")
+        self._push(url, context, delay)
+        return True
+
+    def record_success(self, url):
+        self.breaker.record_success(urlparse(url).netloc)
+        with self.lock:
+            self.attempts.pop(url, None)
+
+    def pop_ready(self):
+        """Return (url, context) pairs whose backoff has elapsed"""
+        ready = []
+        now = time.monotonic()
+        with self.lock:
+            while self.queue and self.queue[0][0] <= now:
+                ready_at, _, url, context = heapq.heappop(self.queue)
+                # Skip entries superseded by a later push or removed by take()
+                if self.queued.get(url) != ready_at:
+                    continue
+                del self.queued[url]
+                ready.append((url, context))
+        return ready
+
+    def take(self, url):
+        """Remove url from the queue and return the seconds left on its backoff"""
+        with self.lock:
+            ready_at = self.queued.pop(url, None)
+        if ready_at is None:
+            return None
+        return max(0, ready_at - time.monotonic())
+
+    def next_delay(self):
+        """Seconds until the next queued URL becomes ready"""
+        with self.lock:
+            if not self.queued:
+                return 0
+            return max(0, min(self.queued.values()) - time.monotonic())
+
+    def _count_attempt(self, url):
+        with self.lock:
+            attempt = self.attempts.get(url, 0) + 1
+            self.attempts[url] = attempt
+        return attempt
+
+    def _push(self, url, context, delay):
+        ready_at = time.monotonic() + delay
+        with self.lock:
+            self.queued[url] = ready_at
+            heapq.heappush(self.queue, (ready_at, next(self.counter), url, context))
@@ -0,0 +1,190 @@
+import argparse
+import gzip
+import json
+import math
+import os
+import re
+import sys
+import time
+import unicodedata
+
+INDEX_FILENAME = 'search_index.json.gz'
+
+TOKEN_PATTERN = re.compile(r'\w+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Title words count more than body words
+TITLE_WEIGHT = 3
+SNIPPET_LENGTH = 200
+
+
+def fold_diacritics(text):
+    """Strip Vietnamese tone and vowel marks so 'Quản lý xe' matches 'quan ly xe'"""
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    decomposed = unicodedata.normalize('NFD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    """Split text into lowercase, diacritic-free tokens"""
+    return TOKEN_PATTERN.findall(fold_diacritics(text.lower()))
+
+
+def extract_text(html):
+    """Return the title and visible text of an HTML page"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    title = soup.title.get_text(strip=True) if soup.title else ''
+    for tag in soup(['script', 'style', 'noscript', 'template', 'svg', 'head']):
+        tag.decompose()
+    text = WHITESPACE_PATTERN.sub(' ', soup.get_text(' ')).strip()
+    return title, text
+
+
+class SearchIndex:
+    """Inverted index over the text of crawled pages"""
+
+    def __init__(self):
+        self.docs = []      # [url, local_path, title, snippet]
+        self.postings = {}  # term -> [(doc_id, term_frequency), ...]
+
+    def add_document(self, url, local_path, title, text):
+        doc_id = len(self.docs)
+        self.docs.append([url, local_path, title, text[:SNIPPET_LENGTH]])
+
+        counts = {}
+        for token in tokenize(text):
+            counts[token] = counts.get(token, 0) + 1
+        for token in tokenize(title):
+            counts[token] = counts.get(token, 0) + TITLE_WEIGHT
+
+        for token, count in counts.items():
+            self.postings.setdefault(token, []).append((doc_id, count))
+
+    def search(self, query, limit=10):
+        """Return the pages containing every query term, best matches first"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        scores = None
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                return []
+            idf = math.log(1 + len(self.docs) / len(postings))
+            term_scores = {doc_id: (1 + math.log(tf)) * idf for doc_id, tf in postings}
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc_id: score + term_scores[doc_id]
+                          for doc_id, score in scores.items() if doc_id in term_scores}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        results = []
+        for doc_id, score in ranked:
+            url, local_path, title, snippet = self.docs[doc_id]
+            results.append({
+                'url': url,
+                'local_path': local_path,
+                'title': title,
+                'snippet': snippet,
+                'score': round(score, 4),
+            })
+        return results
+
+    def save(self, path):
+        """Save the index as gzipped JSON with delta-encoded posting lists"""
+        postings = {}
+        for term, entries in self.postings.items():
+            encoded = []
+            previous = 0
+            for doc_id, tf in entries:
+                encoded.append(doc_id - previous)
+                encoded.append(tf)
+                previous = doc_id
+            postings[term] = encoded
+
+        data = {'version': 1, 'docs': self.docs, 'postings': postings}
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+
+        index = cls()
+        index.docs = data['docs']
+        for term, encoded in data['postings'].items():
+            entries = []
+            doc_id = 0
+            for i in range(0, len(encoded), 2):
+                doc_id += encoded[i]
+                entries.append((doc_id, encoded[i + 1]))
+            index.postings[term] = entries
+        return index
+
+
+def build_index_from_pages(page_data):
+    """Build an index from the crawler's page_data"""
+    index = SearchIndex()
+    for url, data in page_data.items():
+        title, text = extract_text(data['html'])
+        index.add_document(url, data.get('local_path', ''), data.get('title') or title, text)
+    return index
+
+
+def build_index_from_directory(root):
+    """Build an index from the HTML files of an existing mirror"""
+    index = SearchIndex()
+    for dir_path, _, filenames in os.walk(root):
+        for filename in sorted(filenames):
+            if not filename.endswith('.html') or filename == 'sitemap.html':
+                continue
+            full_path = os.path.join(dir_path, filename)
+            local_path = os.path.relpath(full_path, root).replace(os.sep, '/')
+            with open(full_path, 'r', encoding='utf-8', errors='replace') as f:
+                title, text = extract_text(f.read())
+            index.add_document('/' + local_path, local_path, title or local_path, text)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build and query the full-text index of a crawled site')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Index the HTML files of a crawled site')
+    build_parser.add_argument('directory')
+
+    query_parser = subparsers.add_parser('query', help='Search a crawled site')
+    query_parser.add_argument('directory')
+    query_parser.add_argument('query', nargs='+')
+    query_parser.add_argument('--limit', type=int, default=10)
+
+    args = parser.parse_args(argv)
+    index_path = os.path.join(args.directory, INDEX_FILENAME)
+
+    if args.command == 'build':
+        index = build_index_from_directory(args.directory)
+        index.save(index_path)
+        print(f"Indexed {len(index.docs)} pages, {len(index.postings)} terms into {index_path}")
+        return 0
+
+    index = SearchIndex.load(index_path)
+    start = time.perf_counter()
+    results = index.search(' '.join(args.query), limit=args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for result in results:
+        print(f"{result['score']:8.3f}  {result['local_path']}  {result['title']}")
+        print(f"          {result['snippet']}")
+    print(f"{len(results)} results in {elapsed:.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
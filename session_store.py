@@ -0,0 +1,128 @@
+import json
+import os
+import time
+from urllib.parse import urljoin, urlparse
+
+# Static same-origin file to seed the session on; loading the SPA itself
+# would start MSAL, which may redirect to login before the session is in place
+SEED_PATH = '/favicon.ico'
+
+# Hosts the SPA redirects to when the session is no longer valid
+LOGIN_HOSTS = ('login.microsoftonline.com', 'login.live.com', 'login.microsoft.com')
+
+STORAGE_SCRIPT = '''
+var result = {};
+for (var i = 0; i < window[arguments[0]].length; i++) {
+    var key = window[arguments[0]].key(i);
+    result[key] = window[arguments[0]].getItem(key);
+}
+return result;
+'''
+
+RESTORE_STORAGE_SCRIPT = '''
+var items = arguments[1];
+for (var key in items) {
+    window[arguments[0]].setItem(key, items[key]);
+}
+'''
+
+
+class SessionLostError(RuntimeError):
+    """The browser is no longer logged in; crawling on would only mirror login pages"""
+
+
+class SessionStore:
+    """Persist and restore an authenticated browser session (cookies and web storage)"""
+
+    def __init__(self, path='.session/session.json', settle_time=3):
+        self.path = path
+        self.settle_time = settle_time  # Seconds to let the SPA redirect to login if it wants to
+
+    def capture(self, driver):
+        """Return the cookies, localStorage and sessionStorage of the current origin"""
+        return {
+            'url': driver.current_url,
+            'saved_at': time.time(),
+            'cookies': driver.get_cookies(),
+            'local_storage': driver.execute_script(STORAGE_SCRIPT, 'localStorage'),
+            'session_storage': driver.execute_script(STORAGE_SCRIPT, 'sessionStorage'),
+        }
+
+    def apply(self, driver, state, url):
+        """Load a captured session into the browser and open url"""
+        # Cookies and storage can only be set for the origin currently loaded
+        driver.get(urljoin(url, SEED_PATH))
+        now = time.time()
+        for cookie in state.get('cookies', []):
+            if cookie.get('expiry') and cookie['expiry'] < now:
+                continue
+            cookie = dict(cookie)
+            if cookie.get('sameSite') not in ('Strict', 'Lax', 'None'):
+                cookie.pop('sameSite', None)
+            try:
+                driver.add_cookie(cookie)
+            except Exception as e:
+                # Cookies of another domain (e.g. the identity provider) can't be set here
+                print(f"Skipping cookie {cookie.get('name')}: {e}")
+        driver.execute_script(RESTORE_STORAGE_SCRIPT, 'localStorage', state.get('local_storage', {}))
+        driver.execute_script(RESTORE_STORAGE_SCRIPT, 'sessionStorage', state.get('session_storage', {}))
+        driver.get(url)
+
+    def save(self, driver):
+        """Save the current session to disk"""
+        state = self.capture(driver)
+        dir_path = os.path.dirname(self.path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path, mode=0o700)
+        # The file holds live tokens: create it private instead of restricting it after writing
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        # A file left by an older version may still be readable by others
+        os.chmod(self.path, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        print(f"Saved session with {len(state['cookies'])} cookies to {self.path}")
+        return state
+
+    def load(self):
+        """Load the saved session from disk, or None if there is none"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable session file {self.path}: {e}")
+            return None
+
+    def on_login_host(self, driver):
+        """Check whether the browser is on the identity provider's pages"""
+        host = urlparse(driver.current_url).netloc
+        return any(host.endswith(login_host) for login_host in LOGIN_HOSTS)
+
+    def is_logged_in(self, driver):
+        """Check that the browser was not sent to a login page"""
+        time.sleep(self.settle_time)
+        if self.on_login_host(driver):
+            return False
+        return not driver.find_elements('css selector', "input[type='password']")
+
+    def restore(self, driver, url):
+        """Restore the saved session; return True if it is still valid"""
+        state = self.load()
+        if not state:
+            return False
+        self.apply(driver, state, url)
+        if self.is_logged_in(driver):
+            print(f"Restored session saved at {time.ctime(state.get('saved_at', 0))}")
+            return True
+        print("Saved session has expired")
+        return False
+
+    def ensure_login(self, driver, url, prompt="Press Enter when logged in successfully..."):
+        """Reuse the saved session, or wait for a manual login and save it"""
+        if self.restore(driver, url):
+            return
+        driver.get(url)
+        print("Please login manually...")
+        input(prompt)
+        self.save(driver)
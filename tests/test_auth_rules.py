@@ -0,0 +1,58 @@
+from bs4 import BeautifulSoup
+
+from auth_rules import AuthRuleEngine
+
+
+def strip(html, rules=None):
+    soup = BeautifulSoup(html, 'html.parser')
+    report = AuthRuleEngine(rules).apply(soup)
+    return soup, report
+
+
+def test_form_text_split_over_elements():
+    soup, report = strip('<div><form><label>Sign <b>in</b></label><button>Go</button></form></div>')
+    assert soup.find('form') is None
+    assert report == [{'rule': 'login-form', 'element': 'form', 'match': 'sign in'}]
+
+
+def test_form_attribute_name():
+    soup, _ = strip('<form data-password="1"><input name="q"></form>')
+    assert soup.find('form') is None
+
+
+def test_form_keyword_deep_inside():
+    soup, _ = strip('<form><div><div><input type="password"></div></div></form>')
+    assert soup.find('form') is None
+
+
+def test_search_form_is_kept():
+    soup, report = strip('<form action="/search"><input name="q"><button>Tìm kiếm</button></form>')
+    assert soup.find('form') is not None
+    assert report == []
+
+
+def test_auth_class_and_id():
+    soup, report = strip('<div class="card login-box">x</div><div id="authPanel">y</div><p>z</p>')
+    assert [entry['rule'] for entry in report] == ['auth-class', 'auth-id']
+    assert soup.find('div') is None
+    assert soup.find('p').text == 'z'
+
+
+def test_auth_script_only_for_scripts():
+    soup, _ = strip('<script>localStorage.getItem("token")</script><script>render()</script>'
+                    '<p>Your session token expired</p>')
+    assert [script.string for script in soup.find_all('script')] == ['render()']
+    assert soup.find('p') is not None
+
+
+def test_nested_matches_are_removed_once():
+    soup, report = strip('<div class="auth"><form id="login"><input name="password"></form></div><p>kept</p>')
+    assert str(soup) == '<p>kept</p>'
+    assert len(report) == 1
+
+
+def test_custom_rules():
+    rules = [{'name': 'promo', 'attributes': {'class': ['promo']}}]
+    soup, _ = strip('<div class="promo"></div><form><input type="password"></form>', rules)
+    assert soup.find('div') is None
+    assert soup.find('form') is not None
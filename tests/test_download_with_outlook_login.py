@@ -0,0 +1,100 @@
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('pywebcopy')
+
+from download_with_outlook_login import SharedAssetAdapter, save_page
+
+PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082')
+
+PAGE = '''<!DOCTYPE html>
+<html><head><link rel="stylesheet" href="/static/site.css"></head>
+<body><h1>{title}</h1><img src="/static/logo.png"></body></html>
+'''
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    unavailable = set()  # Paths answered with a plain-text 503
+
+    def do_GET(self):
+        if self.path in self.unavailable:
+            body = b'Service Unavailable'
+            self.send_response(503)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path):
+    root = tmp_path / 'site'
+    (root / 'static').mkdir(parents=True)
+    (root / 'static' / 'site.css').write_text('body { color: red; }')
+    (root / 'static' / 'logo.png').write_bytes(PNG)
+    (root / 'a.html').write_text(PAGE.format(title='Trang A'))
+    (root / 'b.html').write_text(PAGE.format(title='Trang B'))
+
+    QuietHandler.unavailable = set()
+    handler = functools.partial(QuietHandler, directory=str(root))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def saved_files(folder):
+    files = {}
+    for dir_path, _, filenames in os.walk(folder):
+        for filename in filenames:
+            files[filename] = os.path.join(dir_path, filename)
+    return files
+
+
+def test_pages_share_downloaded_assets(site, tmp_path):
+    folder = str(tmp_path / 'saved')
+    adapter = SharedAssetAdapter()
+
+    for page in ('a.html', 'b.html'):
+        save_page(f'{site}/{page}', folder, 'site', [], 'test-agent', adapter, 0)
+
+    files = saved_files(folder)
+    for page, title in (('a.html', 'Trang A'), ('b.html', 'Trang B')):
+        with open(files[page], encoding='utf-8') as f:
+            assert title in f.read()
+
+    with open(files['site.css'], encoding='utf-8') as f:
+        assert 'color: red' in f.read()
+    with open(files['logo.png'], 'rb') as f:
+        assert f.read() == PNG
+
+    # Each shared asset was fetched once and the pages themselves are not cached
+    assert sorted(url.rsplit('/', 1)[1] for url in adapter.cache) == ['logo.png', 'site.css']
+
+
+def test_failed_asset_is_not_cached(site, tmp_path):
+    folder = str(tmp_path / 'saved')
+    adapter = SharedAssetAdapter()
+    QuietHandler.unavailable.add('/static/logo.png')
+
+    save_page(f'{site}/a.html', folder, 'site', [], 'test-agent', adapter, 0)
+    assert [url for url in adapter.cache if url.endswith('logo.png')] == []
+
+    # Once the asset is back, the next page downloads it instead of reusing the error
+    QuietHandler.unavailable.clear()
+    save_page(f'{site}/b.html', folder, 'site', [], 'test-agent', adapter, 0)
+    with open(saved_files(folder)['logo.png'], 'rb') as f:
+        assert f.read() == PNG